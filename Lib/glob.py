@@ -237,6 +237,12 @@ def has_magic(s):
         match = magic_check.search(s)
     return match is not None
 
+def _has_magic_str(part):
+    """Returns whether the pattern segment *part* contains wildcards."""
+    # The selectors use this rather than has_magic(): chained `in` checks are
+    # faster than a regex search on such short strings.
+    return '*' in part or '?' in part or '[' in part
+
 def _ishidden(path):
     return path[0] in ('.', b'.'[0])
 
@@ -264,6 +270,30 @@ def escape(pathname):
 _no_recurse_symlinks = object()
 
 
+@functools.cache
+def _translate_fragments(seps, include_hidden):
+    """Returns the regex fragments used by translate() for the given tuple of
+    separators. These depend only on the separators and on *include_hidden*,
+    so they're computed once per combination. The tuple returned holds the
+    first separator, then the fragments in the order _translate() unpacks.
+    """
+    escaped_seps = ''.join(map(re.escape, seps))
+    any_sep = f'[{escaped_seps}]' if len(seps) > 1 else escaped_seps
+    not_sep = f'[^{escaped_seps}]'
+    if include_hidden:
+        one_last_segment = f'{not_sep}+'
+        one_segment = f'{one_last_segment}{any_sep}'
+        any_segments = f'(?:.+{any_sep})?'
+        any_last_segments = '.*'
+    else:
+        one_last_segment = f'[^{escaped_seps}.]{not_sep}*'
+        one_segment = f'{one_last_segment}{any_sep}'
+        any_segments = f'(?:{one_segment})*'
+        any_last_segments = f'{any_segments}(?:{one_last_segment})?'
+    return (seps[0], any_sep, not_sep, f'{not_sep}*', one_segment,
+            one_last_segment, any_segments, any_last_segments)
+
+
 def translate(pat, *, recursive=False, include_hidden=False, seps=None):
     """Translate a pathname with shell wildcards to a regular expression.
 
@@ -277,55 +307,107 @@ def translate(pat, *, recursive=False, include_hidden=False, seps=None):
     used to split the pattern into segments and match path separators. If not
     given, os.path.sep and os.path.altsep (where available) are used.
     """
+    res = _translate(pat, recursive, include_hidden, seps)
+    return fr'(?s:{res})\Z'
+
+
+def _translate(pat, recursive, include_hidden, seps):
+    """Returns the unanchored body of the regex built by translate()."""
     if not seps:
         if os.path.altsep:
             seps = (os.path.sep, os.path.altsep)
         else:
             seps = os.path.sep
-    escaped_seps = ''.join(map(re.escape, seps))
-    any_sep = f'[{escaped_seps}]' if len(seps) > 1 else escaped_seps
-    not_sep = f'[^{escaped_seps}]'
-    if include_hidden:
-        one_last_segment = f'{not_sep}+'
-        one_segment = f'{one_last_segment}{any_sep}'
-        any_segments = f'(?:.+{any_sep})?'
-        any_last_segments = '.*'
-    else:
-        one_last_segment = f'[^{escaped_seps}.]{not_sep}*'
-        one_segment = f'{one_last_segment}{any_sep}'
-        any_segments = f'(?:{one_segment})*'
-        any_last_segments = f'{any_segments}(?:{one_last_segment})?'
+    (sep, any_sep, not_sep, any_not_sep, one_segment, one_last_segment,
+     any_segments, any_last_segments) = _translate_fragments(tuple(seps),
+                                                             include_hidden)
+
+    # Normalize alternate separators so that segments can be located with a
+    # single str.find() call; every separator translates to `any_sep` anyway.
+    for altsep in seps[1:]:
+        pat = pat.replace(altsep, sep)
 
     results = []
-    parts = re.split(any_sep, pat)
-    last_part_idx = len(parts) - 1
-    for idx, part in enumerate(parts):
+    start = 0
+    end = len(pat)
+    while start <= end:
+        idx = pat.find(sep, start)
+        last = idx < 0
+        if last:
+            idx = end
+        part = pat[start:idx]
+        start = idx + 1
         if part == '*':
-            results.append(one_segment if idx < last_part_idx else one_last_segment)
+            results.append(one_last_segment if last else one_segment)
         elif recursive and part == '**':
-            if idx < last_part_idx:
-                if parts[idx + 1] != '**':
-                    results.append(any_segments)
-            else:
+            if last:
                 results.append(any_last_segments)
+            elif not (pat.startswith('**', start) and
+                      (start + 2 == end or pat[start + 2] == sep)):
+                # Consecutive '**' segments are collapsed into the last one.
+                results.append(any_segments)
         else:
             if part:
                 if not include_hidden and part[0] in '*?':
                     results.append(r'(?!\.)')
-                results.extend(fnmatch._translate(part, f'{not_sep}*', not_sep))
-            if idx < last_part_idx:
+                if '[' in part:
+                    results.extend(fnmatch._translate(part, any_not_sep, not_sep))
+                else:
+                    _translate_segment(part, any_not_sep, not_sep, results)
+            if not last:
                 results.append(any_sep)
-    res = ''.join(results)
-    return fr'(?s:{res})\Z'
+    return ''.join(results)
+
+
+def _translate_segment(part, any_not_sep, not_sep, results):
+    """Append the regex fragments for a pattern segment without brackets."""
+    # This is a fast path for fnmatch._translate(), which produces identical
+    # output for segments that only contain '*' and '?' wildcards.
+    i = 0
+    n = len(part)
+    while i < n:
+        j = i
+        while j < n and part[j] not in '*?':
+            j += 1
+        if j > i:
+            results.append(re.escape(part[i:j]))
+            if j == n:
+                break
+        if part[j] == '*':
+            results.append(any_not_sep)
+            j += 1
+            # compress consecutive `*` into one
+            while j < n and part[j] == '*':
+                j += 1
+        else:
+            results.append(not_sep)
+            j += 1
+        i = j
+
+
+# The number of distinct patterns compiled in a process is bounded in practice,
+# so rather than paying for LRU bookkeeping on every lookup, the cache is
+# simply dumped when it grows too large.
+_pattern_cache = {}
+_MAXCACHE = 4096
 
 
-@functools.lru_cache(maxsize=512)
 def _compile_pattern(pat, sep, case_sensitive, recursive=True):
     """Compile given glob pattern to a re.Pattern object (observing case
     sensitivity)."""
+    key = (pat, sep, case_sensitive, recursive)
+    try:
+        return _pattern_cache[key]
+    except KeyError:
+        pass
     flags = re.NOFLAG if case_sensitive else re.IGNORECASE
-    regex = translate(pat, recursive=recursive, include_hidden=True, seps=sep)
-    return re.compile(regex, flags=flags).match
+    # Use fullmatch() rather than a trailing '\Z' assertion to anchor the end.
+    regex = _translate(pat, recursive, True, sep)
+    match = re.compile(f'(?s:{regex})', flags=flags).fullmatch
+    if len(_pattern_cache) >= _MAXCACHE:
+        _pattern_cache.clear()
+    _pattern_cache[key] = match
+    return match
 
 
 class _GlobberBase:
@@ -373,7 +455,32 @@ def parse_entry(entry):
     # High-level methods
 
     def compile(self, pat):
-        return _compile_pattern(pat, self.sep, self.case_sensitive, self.recursive)
+        # self.recursive may be the _no_recurse_symlinks sentinel, which
+        # translates exactly like True; share cache entries between them.
+        recursive = bool(self.recursive)
+        return _compile_pattern(pat, self.sep, self.case_sensitive, recursive)
+
+    def compile_recursive_suffix(self, pat):
+        """Returns a function that matches paths against a pattern of the form
+        '**/*suffix', where *suffix* is literal, or None for other patterns.
+        Like the compiled regex, the function accepts a start position.
+
+        recursive_selector() only joins '**' with the parts that follow it
+        when following symlinks, so this only applies with
+        recurse_symlinks=True; Path.rglob('*.py') doesn't use it by default.
+        Case-insensitive matching and suffixes with wildcards always use the
+        regex.
+        """
+        prefix = '**' + self.sep + '*'
+        if not self.case_sensitive or not pat.startswith(prefix):
+            return None
+        suffix = pat[len(prefix):]
+        if not suffix or self.sep in suffix or _has_magic_str(suffix):
+            return None
+
+        def match_suffix(path, pos=0):
+            return path.endswith(suffix, pos)
+        return match_suffix
 
     def selector(self, parts):
         """Returns a function that selects from a given path, walking and
@@ -386,10 +493,10 @@ def selector(self, parts):
             selector = self.recursive_selector
         elif part in _special_parts:
             selector = self.special_selector
-        elif not self.case_pedantic and magic_check.search(part) is None:
-            selector = self.literal_selector
-        else:
+        elif self.case_pedantic or _has_magic_str(part):
             selector = self.wildcard_selector
+        else:
+            selector = self.literal_selector
         return selector(part, parts)
 
     def special_selector(self, part, parts):
@@ -409,11 +516,16 @@ def literal_selector(self, part, parts):
         # Optimization: consume and join any subsequent literal parts here,
         # rather than leaving them for the next selector. This reduces the
         # number of string concatenation operations and calls to add_slash().
-        while parts and magic_check.search(parts[-1]) is None:
+        while parts and not _has_magic_str(parts[-1]):
             part += self.sep + parts.pop()
 
         select_next = self.selector(parts)
+        return self.literal_step(part, select_next)
 
+    def literal_step(self, part, select_next):
+        """Returns a function that joins the literal *part* onto a path and
+        selects from the result with *select_next*.
+        """
         def select_literal(path, exists=False):
             path = self.concat_path(self.add_slash(path), part)
             return select_next(path, exists=False)
@@ -425,32 +537,49 @@ def wildcard_selector(self, part, parts):
         """
 
         match = None if part == '*' else self.compile(part)
-        dir_only = bool(parts)
-        if dir_only:
+
+        # Optimization: build separate functions for intermediate and final
+        # pattern parts, rather than checking for every entry whether only
+        # directories should be selected.
+        if parts:
             select_next = self.selector(parts)
 
-        def select_wildcard(path, exists=False):
-            try:
-                # We must close the scandir() object before proceeding to
-                # avoid exhausting file descriptors when globbing deep trees.
-                with self.scandir(path) as scandir_it:
-                    entries = list(scandir_it)
-            except OSError:
-                pass
-            else:
-                for entry in entries:
-                    if match is None or match(entry.name):
-                        if dir_only:
-                            try:
-                                if not entry.is_dir():
-                                    continue
-                            except OSError:
-                                continue
-                        entry_path = self.parse_entry(entry)
-                        if dir_only:
-                            yield from select_next(entry_path, exists=True)
+            def select_wildcard(path, exists=False):
+                try:
+                    # We must close the scandir() object before proceeding to
+                    # avoid exhausting file descriptors when globbing deep
+                    # trees. Entries are filtered while scanning, so only the
+                    # paths of matching directories are kept.
+                    with self.scandir(path) as scandir_it:
+                        entry_paths = []
+                        for entry in scandir_it:
+                            if match is None or match(entry.name):
+                                try:
+                                    if entry.is_dir():
+                                        entry_paths.append(self.parse_entry(entry))
+                                except OSError:
+                                    pass
+                except OSError:
+                    pass
+                else:
+                    for entry_path in entry_paths:
+                        yield from select_next(entry_path, exists=True)
+        else:
+            def select_wildcard(path, exists=False):
+                try:
+                    # Entries are filtered while scanning, so only the paths
+                    # of matching entries are kept.
+                    with self.scandir(path) as scandir_it:
+                        if match is None:
+                            entry_paths = list(map(self.parse_entry, scandir_it))
                         else:
-                            yield entry_path
+                            entry_paths = [self.parse_entry(entry)
+                                           for entry in scandir_it
+                                           if match(entry.name)]
+                except OSError:
+                    pass
+                else:
+                    yield from entry_paths
         return select_wildcard
 
     def recursive_selector(self, part, parts):
@@ -472,7 +601,10 @@ def recursive_selector(self, part, parts):
             while parts and parts[-1] not in _special_parts:
                 part += self.sep + parts.pop()
 
-        match = None if part == '**' else self.compile(part)
+        if part == '**':
+            match = None
+        else:
+            match = self.compile_recursive_suffix(part) or self.compile(part)
         dir_only = bool(parts)
         select_next = self.selector(parts)
 
@@ -490,30 +622,41 @@ def select_recursive_step(stack, match_pos):
             try:
                 # We must close the scandir() object before proceeding to
                 # avoid exhausting file descriptors when globbing deep trees.
+                # Entries are filtered while scanning, so only the paths of
+                # matching entries and subdirectories are kept.
                 with self.scandir(path) as scandir_it:
-                    entries = list(scandir_it)
+                    entry_paths = []
+                    dir_paths = []
+                    for entry in scandir_it:
+                        is_dir = False
+                        try:
+                            # os.DirEntry answers this from the cached d_type,
+                            # and only calls stat() for symlinks when following
+                            # them. Don't add an is_symlink() pre-check here:
+                            # it can't save a syscall, and costs one for other
+                            # path types.
+                            if entry.is_dir(follow_symlinks=follow_symlinks):
+                                is_dir = True
+                        except OSError:
+                            pass
+
+                        if is_dir or not dir_only:
+                            entry_path = self.parse_entry(entry)
+                            if match is None or match(str(entry_path), match_pos):
+                                entry_paths.append(entry_path)
+                            if is_dir:
+                                dir_paths.append(entry_path)
             except OSError:
                 pass
             else:
-                for entry in entries:
-                    is_dir = False
-                    try:
-                        if entry.is_dir(follow_symlinks=follow_symlinks):
-                            is_dir = True
-                    except OSError:
-                        pass
-
-                    if is_dir or not dir_only:
-                        entry_path = self.parse_entry(entry)
-                        if match is None or match(str(entry_path), match_pos):
-                            if dir_only:
-                                yield from select_next(entry_path, exists=True)
-                            else:
-                                # Optimization: directly yield the path if this is
-                                # last pattern part.
-                                yield entry_path
-                        if is_dir:
-                            stack.append(entry_path)
+                if dir_only:
+                    for entry_path in entry_paths:
+                        yield from select_next(entry_path, exists=True)
+                else:
+                    # Optimization: directly yield the path if this is
+                    # last pattern part.
+                    yield from entry_paths
+                stack.extend(dir_paths)
 
         return select_recursive
 
@@ -540,12 +683,28 @@ class _StringGlobber(_GlobberBase):
         @staticmethod
         def add_slash(pathname):
             tail = os.path.splitroot(pathname)[2]
-            if not tail or tail[-1] in '\\/':
+            if not tail or tail.endswith(('\\', '/')):
                 return pathname
-            return f'{pathname}\\'
+            return pathname + '\\'
     else:
         @staticmethod
         def add_slash(pathname):
-            if not pathname or pathname[-1] == '/':
+            if not pathname or pathname.endswith('/'):
                 return pathname
-            return f'{pathname}/'
+            return pathname + '/'
+
+        def literal_step(self, part, select_next):
+            """Returns a function that joins the literal *part* onto a path and
+            selects from the result with *select_next*.
+            """
+            slash_part = f'/{part}'
+
+            # Optimization: inline add_slash() and concat_path() so that each
+            # call needs a single string concatenation.
+            def select_literal(path, exists=False):
+                if not path or path.endswith('/'):
+                    path += part
+                else:
+                    path += slash_part
+                return select_next(path, exists=False)
+            return select_literal
@@ -50,10 +50,44 @@ def capwords(s, sep=None):
 
 ####################################################################
 import re as _re
-from collections import ChainMap as _ChainMap
 
 _sentinel_dict = {}
 
+# Maps the ids of the patterns used by Template to tuples of the pattern, the
+# numbers of its named, braced, escaped and invalid groups, the delimiter
+# that every match starts with verbatim, or None, and the escaped form of a
+# single character delimiter, or None.  The groups are accessed by number
+# rather than by name for every match.  Each tuple keeps its pattern alive,
+# so the id cannot be reused while it is cached.
+_syntax_cache = {}
+_MAXCACHE = 512
+
+def _syntax(pattern, delimiter=None):
+    if delimiter is None:
+        try:
+            return _syntax_cache[id(pattern)]
+        except KeyError:
+            pass
+    # A missing group gives None, which makes group() raise IndexError
+    # just like an unknown group name would.
+    if delimiter is not None and len(delimiter) == 1:
+        escape = delimiter * 2
+    else:
+        escape = None
+    groupindex = pattern.groupindex
+    syntax = (pattern, groupindex.get('named'), groupindex.get('braced'),
+              groupindex.get('escaped'), groupindex.get('invalid'), delimiter,
+              escape)
+    if len(_syntax_cache) < _MAXCACHE:
+        _syntax_cache[id(pattern)] = syntax
+    return syntax
+
+def _without_parsed(state):
+    if isinstance(state, dict) and '_parsed' in state:
+        state = state.copy()
+        del state['_parsed']
+    return state
+
 class Template:
     """A string class for supporting $-substitutions."""
 
@@ -65,11 +99,16 @@ class Template:
     idpattern = r'(?a:[_a-z][_a-z0-9]*)'
     braceidpattern = None
     flags = _re.IGNORECASE
+    # The template, its pattern and the parsed template; see _parse().
+    _parsed = None
+    # The entry of _syntax_cache for the pattern; set with the pattern.
+    _pattern_syntax = (None,)
 
     def __init_subclass__(cls):
         super().__init_subclass__()
         if 'pattern' in cls.__dict__:
-            pattern = cls.pattern
+            cls.pattern = _re.compile(cls.pattern, cls.flags | _re.VERBOSE)
+            cls._pattern_syntax = _syntax(cls.pattern)
         else:
             delim = _re.escape(cls.delimiter)
             id = cls.idpattern
@@ -82,13 +121,24 @@ def __init_subclass__(cls):
               (?P<invalid>)             # Other ill-formed delimiter exprs
             )
             """
-        cls.pattern = _re.compile(pattern, cls.flags | _re.VERBOSE)
+            # Defer compiling the pattern until it is first used.
+            cls.pattern = _TemplatePattern(pattern, cls.flags | _re.VERBOSE,
+                                           cls.delimiter)
 
     def __init__(self, template):
         self.template = template
 
     # Search for $$, $identifier, ${identifier}, and any bare $'s
 
+    def __getstate__(self):
+        # The parsed template is only a cache, so leave it out of pickles
+        # and copies.  With __slots__, the state is a tuple of the instance
+        # dict and a dict of the slot values.
+        state = super().__getstate__()
+        if isinstance(state, tuple):
+            return tuple(map(_without_parsed, state))
+        return _without_parsed(state)
+
     def _invalid(self, mo):
         i = mo.start('invalid')
         lines = self.template[:i].splitlines(keepends=True)
@@ -96,58 +146,199 @@ def _invalid(self, mo):
             colno = 1
             lineno = 1
         else:
-            colno = i - len(''.join(lines[:-1]))
+            colno = len(lines[-1])
             lineno = len(lines)
         raise ValueError('Invalid placeholder in string: line %d, col %d' %
                          (lineno, colno))
 
+    def _parse(self):
+        # Returns the placeholders in the template as a list of tuples of the
+        # preceding literal text, the identifier, the text to use for escapes
+        # and for unknown identifiers in safe_substitute(), and the start
+        # of ill-formed placeholders; plus the trailing literal text.
+        # The result is cached for as long as the template and pattern stay
+        # the same, so reusing a Template does not rescan it.
+        template = self.template
+        pattern = self.pattern
+        cached = self._parsed
+        if cached is not None and cached[0] is template and cached[1] is pattern:
+            return cached[2]
+        syntax = self._pattern_syntax
+        if syntax[0] is not pattern:
+            # The pattern was set on the instance or replaced.
+            syntax = _syntax(pattern)
+        (_, named_group, braced_group, escaped_group, invalid_group,
+         delimiter, escape) = syntax
+        if delimiter is not None and delimiter not in template:
+            parsed = [], template
+        elif (escape is not None and
+              delimiter not in template.replace(escape, '')):
+            # Only escaped delimiters.
+            parsed = [], template.replace(escape, self.delimiter)
+        else:
+            placeholders = []
+            append = placeholders.append
+            pos = 0
+            for mo in pattern.finditer(template):
+                literal = template[pos:mo.start()]
+                pos = mo.end()
+                named = mo[named_group] or mo[braced_group]
+                if named is not None:
+                    append((literal, named, mo[0], None))
+                elif mo[escaped_group] is not None:
+                    append((literal, None, self.delimiter, None))
+                elif mo[invalid_group] is not None:
+                    append((literal, None, mo[0], mo.start()))
+                else:
+                    # If all the groups are None, there must be
+                    # another group we're not expecting
+                    append((literal, None, None, None))
+            parsed = placeholders, template[pos:]
+        self._parsed = (template, pattern, parsed)
+        return parsed
+
     def substitute(self, mapping=_sentinel_dict, /, **kws):
         if mapping is _sentinel_dict:
             mapping = kws
-        elif kws:
-            mapping = _ChainMap(kws, mapping)
-        # Helper function for .sub()
-        def convert(mo):
+        template = self.template
+        cached = self._parsed
+        if cached is None or cached[0] is not template:
+            pattern = self.pattern
+            syntax = self._pattern_syntax
+            if syntax[0] is not pattern:
+                # The pattern was set on the instance or replaced.
+                syntax = _syntax(pattern)
+            (_, named_group, braced_group, escaped_group, invalid_group,
+             delimiter, escape) = syntax
+            if delimiter is not None and delimiter not in template:
+                # Nothing to substitute.
+                return template
+            if (escape is not None and escape in template and
+                    delimiter not in template.replace(escape, '')):
+                # Only escaped delimiters.
+                return template.replace(escape, self.delimiter)
+            # A single substitution is faster done by pattern.sub() than by
+            # parsing the template first, so only parse it once it is used
+            # again.
+            self._parsed = (template, None, None)
+            # Helper function for .sub().  Its state is passed as default
+            # arguments, which is cheaper than closing over it.
+            def convert(mo, self=self, mapping=mapping, kws=kws,
+                        named_group=named_group, braced_group=braced_group,
+                        escaped_group=escaped_group,
+                        invalid_group=invalid_group):
+                # Check the most common path first.
+                named = mo[named_group] or mo[braced_group]
+                if named is not None:
+                    # Keyword arguments take precedence over the mapping.
+                    if kws and named in kws:
+                        return str(kws[named])
+                    return str(mapping[named])
+                if mo[escaped_group] is not None:
+                    return self.delimiter
+                if mo[invalid_group] is not None:
+                    self._invalid(mo)
+                raise ValueError('Unrecognized named group in pattern',
+                                 self.pattern)
+            return pattern.sub(convert, template)
+        placeholders, tail = self._parse()
+        if not placeholders:
+            return tail
+        result = []
+        append = result.append
+        for literal, named, text, invalid in placeholders:
+            append(literal)
             # Check the most common path first.
-            named = mo.group('named') or mo.group('braced')
             if named is not None:
-                return str(mapping[named])
-            if mo.group('escaped') is not None:
-                return self.delimiter
-            if mo.group('invalid') is not None:
-                self._invalid(mo)
-            raise ValueError('Unrecognized named group in pattern',
-                             self.pattern)
-        return self.pattern.sub(convert, self.template)
+                # Keyword arguments take precedence over the mapping.
+                if named in kws:
+                    append(str(kws[named]))
+                else:
+                    append(str(mapping[named]))
+            elif invalid is not None:
+                # Match the placeholder again for _invalid().
+                self._invalid(self.pattern.match(self.template, invalid))
+            elif text is not None:
+                append(text)
+            else:
+                raise ValueError('Unrecognized named group in pattern',
+                                 self.pattern)
+        append(tail)
+        return ''.join(result)
 
     def safe_substitute(self, mapping=_sentinel_dict, /, **kws):
         if mapping is _sentinel_dict:
             mapping = kws
-        elif kws:
-            mapping = _ChainMap(kws, mapping)
-        # Helper function for .sub()
-        def convert(mo):
-            named = mo.group('named') or mo.group('braced')
+        template = self.template
+        cached = self._parsed
+        if cached is None or cached[0] is not template:
+            pattern = self.pattern
+            syntax = self._pattern_syntax
+            if syntax[0] is not pattern:
+                # The pattern was set on the instance or replaced.
+                syntax = _syntax(pattern)
+            (_, named_group, braced_group, escaped_group, invalid_group,
+             delimiter, escape) = syntax
+            if delimiter is not None and delimiter not in template:
+                # Nothing to substitute.
+                return template
+            if (escape is not None and escape in template and
+                    delimiter not in template.replace(escape, '')):
+                # Only escaped delimiters.
+                return template.replace(escape, self.delimiter)
+            # A single substitution is faster done by pattern.sub() than by
+            # parsing the template first, so only parse it once it is used
+            # again.
+            self._parsed = (template, None, None)
+            # Helper function for .sub().  Its state is passed as default
+            # arguments, which is cheaper than closing over it.
+            def convert(mo, self=self, mapping=mapping, kws=kws,
+                        named_group=named_group, braced_group=braced_group,
+                        escaped_group=escaped_group,
+                        invalid_group=invalid_group):
+                named = mo[named_group] or mo[braced_group]
+                if named is not None:
+                    try:
+                        if kws and named in kws:
+                            return str(kws[named])
+                        return str(mapping[named])
+                    except KeyError:
+                        return mo[0]
+                if mo[escaped_group] is not None:
+                    return self.delimiter
+                if mo[invalid_group] is not None:
+                    return mo[0]
+                raise ValueError('Unrecognized named group in pattern',
+                                 self.pattern)
+            return pattern.sub(convert, template)
+        placeholders, tail = self._parse()
+        if not placeholders:
+            return tail
+        result = []
+        append = result.append
+        for literal, named, text, invalid in placeholders:
+            append(literal)
             if named is not None:
                 try:
-                    return str(mapping[named])
+                    if named in kws:
+                        append(str(kws[named]))
+                    else:
+                        append(str(mapping[named]))
                 except KeyError:
-                    return mo.group()
-            if mo.group('escaped') is not None:
-                return self.delimiter
-            if mo.group('invalid') is not None:
-                return mo.group()
-            raise ValueError('Unrecognized named group in pattern',
-                             self.pattern)
-        return self.pattern.sub(convert, self.template)
+                    append(text)
+            elif text is not None:
+                append(text)
+            else:
+                raise ValueError('Unrecognized named group in pattern',
+                                 self.pattern)
+        append(tail)
+        return ''.join(result)
 
     def is_valid(self):
-        for mo in self.pattern.finditer(self.template):
-            if mo.group('invalid') is not None:
+        for literal, named, text, invalid in self._parse()[0]:
+            if invalid is not None:
                 return False
-            if (mo.group('named') is None
-                and mo.group('braced') is None
-                and mo.group('escaped') is None):
+            if named is None and text is None:
                 # If all the groups are None, there must be
                 # another group we're not expecting
                 raise ValueError('Unrecognized named group in pattern',
@@ -156,20 +347,56 @@ def is_valid(self):
 
     def get_identifiers(self):
         ids = []
-        for mo in self.pattern.finditer(self.template):
-            named = mo.group('named') or mo.group('braced')
-            if named is not None and named not in ids:
+        seen = set()
+        for literal, named, text, invalid in self._parse()[0]:
+            if named is not None and named not in seen:
                 # add a named group only the first time it appears
+                seen.add(named)
                 ids.append(named)
-            elif (named is None
-                and mo.group('invalid') is None
-                and mo.group('escaped') is None):
+            elif named is None and text is None:
                 # If all the groups are None, there must be
                 # another group we're not expecting
                 raise ValueError('Unrecognized named group in pattern',
                     self.pattern)
         return ids
 
+
+class _TemplatePattern:
+    """Descriptor compiling the default pattern of a Template class.
+
+    The pattern is built from the class's delimiter, idpattern,
+    braceidpattern and flags when the class is created, but only compiled
+    on first access.  The compiled pattern then replaces the descriptor in
+    the class's namespace.
+    """
+
+    # Compiled patterns, shared by the classes with the same settings.
+    _cache = {}
+
+    def __init__(self, pattern, flags, delimiter):
+        self.pattern = pattern
+        self.flags = flags
+        self.delimiter = delimiter
+
+    def __get__(self, instance, owner):
+        key = self.pattern, self.flags
+        try:
+            pattern = self._cache[key]
+        except KeyError:
+            pattern = _re.compile(self.pattern, self.flags)
+            self._cache[key] = pattern
+            # Templates without the delimiter can then be parsed without
+            # running the pattern.  Letters may match case-insensitively,
+            # though.
+            delimiter = self.delimiter
+            if (not pattern.flags & _re.IGNORECASE or
+                    (delimiter.isascii() and
+                     not any(map(str.isalpha, delimiter)))):
+                _syntax(pattern, delimiter)
+        owner.pattern = pattern
+        owner._pattern_syntax = _syntax(pattern)
+        return pattern
+
 # Initialize Template.pattern.  __init_subclass__() is automatically called
 # only for subclasses, not for the Template class itself.
 Template.__init_subclass__()
@@ -185,12 +412,28 @@ def get_identifiers(self):
 # The overall parser is implemented in _string.formatter_parser.
 # The field name parser is implemented in _string.formatter_field_name_split
 
+# Passed to Formatter._vformat() as used_args when check_unused_args() is
+# not overridden, so that nothing is collected.  Its add() does nothing.
+class _NoUsedArgs(frozenset):
+    __slots__ = ()
+
+    def add(self, arg, /):
+        pass
+
+_no_used_args = _NoUsedArgs()
+
 class Formatter:
     def format(self, format_string, /, *args, **kwargs):
         return self.vformat(format_string, args, kwargs)
 
     def vformat(self, format_string, args, kwargs):
-        used_args = set()
+        # the default check_unused_args() ignores used_args, so only
+        #  collect them when it has been overridden
+        if (getattr(self.check_unused_args, '__func__', None)
+                is Formatter.check_unused_args):
+            used_args = _no_used_args
+        else:
+            used_args = set()
         result, _ = self._vformat(format_string, args, kwargs, used_args, 2)
         self.check_unused_args(used_args, args, kwargs)
         return result
@@ -237,11 +480,13 @@ def _vformat(self, format_string, args, kwargs, used_args, recursion_depth,
                 # do any conversion on the resulting object
                 obj = self.convert_field(obj, conversion)
 
-                # expand the format spec, if needed
-                format_spec, auto_arg_index = self._vformat(
-                    format_spec, args, kwargs,
-                    used_args, recursion_depth-1,
-                    auto_arg_index=auto_arg_index)
+                # expand the format spec, if needed; an empty spec has
+                #  nothing to expand unless it exceeds the recursion limit
+                if format_spec or recursion_depth < 1:
+                    format_spec, auto_arg_index = self._vformat(
+                        format_spec, args, kwargs,
+                        used_args, recursion_depth-1,
+                        auto_arg_index=auto_arg_index)
 
                 # format the object and append to the result
                 result.append(self.format_field(obj, format_spec))
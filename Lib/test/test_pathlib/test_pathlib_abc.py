@@ -2175,8 +2175,9 @@ def test_rglob_windows(self):
 
     @needs_symlinks
     def test_rglob_recurse_symlinks_common(self):
-        def _check(path, glob, expected):
-            actual = {path for path in path.rglob(glob, recurse_symlinks=True)
+        def _check(path, glob, expected, case_sensitive=None):
+            actual = {path for path in path.rglob(glob, case_sensitive=case_sensitive,
+                                                  recurse_symlinks=True)
                       if path.parts.count("linkD") <= 1}  # exclude symlink loop.
             self.assertEqual(actual, { P(self.base, q) for q in expected })
         P = self.cls
@@ -2201,6 +2202,11 @@ def _check(path, glob, expected):
         _check(p, "*/*", ["dirC/dirD/fileD"])
         _check(p, "*/", ["dirC/dirD/"])
         _check(p, "", ["dirC/", "dirC/dirD/"])
+        _check(p, "*C", ["dirC/fileC"])
+        _check(p, "*c", [], case_sensitive=True)
+        _check(p, "*c", ["dirC/fileC"], case_sensitive=False)
+        _check(p, "*?C", ["dirC/fileC"])
+        _check(p, "*[CD]", ["dirC/fileC", "dirC/dirD", "dirC/dirD/fileD"])
         # gh-91616, a re module regression
         _check(p, "*.txt", ["dirC/novel.txt"])
         _check(p, "*.*", ["dirC/novel.txt"])
@@ -1,3 +1,6 @@
+import copy
+import pickle
+import re
 import unittest
 import string
 from string import Template
@@ -179,6 +182,35 @@ def check_unused_args(self, used_args, args, kwargs):
         self.assertRaises(ValueError, fmt.format, "{0}", 10, 20, i=100)
         self.assertRaises(ValueError, fmt.format, "{i}", 10, 20, i=100)
 
+        # check_unused_args() can also be set on the instance.
+        def check_unused_args(used_args, args, kwargs):
+            checked.append(set(used_args))
+        checked = []
+        fmt = string.Formatter()
+        fmt.check_unused_args = check_unused_args
+        self.assertEqual(fmt.format("{0}{i:{1}}", 10, 3, i=1, j=0), "10  1")
+        self.assertEqual(checked, [{0, 1, 'i'}])
+
+    def test_override_vformat_used_args(self):
+        class TrackingFormatter(string.Formatter):
+            def get_field(self, field_name, args, kwargs):
+                obj, first = super().get_field(field_name, args, kwargs)
+                fields.append(first)
+                return obj, first
+
+            def _vformat(self, format_string, args, kwargs, used_args,
+                         recursion_depth, auto_arg_index=0):
+                used_args.add('vformat')
+                return super()._vformat(format_string, args, kwargs,
+                                        used_args, recursion_depth,
+                                        auto_arg_index)
+
+        # used_args supports add() even if check_unused_args() ignores it.
+        fields = []
+        fmt = TrackingFormatter()
+        self.assertEqual(fmt.format("{0}{i}", 10, i=100), "10100")
+        self.assertEqual(fields, [0, 'i'])
+
     def test_vformat_recursion_limit(self):
         fmt = string.Formatter()
         args = ()
@@ -204,6 +236,10 @@ def __getitem__(self, name):
         return obj
 
 
+class SlotsTemplate(Template):
+    __slots__ = ('extra',)
+
+
 class TestTemplate(unittest.TestCase):
     def test_regular_templates(self):
         s = Template('$who likes to eat a bag of $what worth $$100')
@@ -236,6 +272,18 @@ def test_escapes(self):
            'tim likes to eat a bag of $what worth $100')
         s = Template('$who likes $$')
         eq(s.substitute(dict(who='tim', what='ham')), 'tim likes $')
+        # Templates with only escaped delimiters.
+        for tmpl, expected in [('$$', '$'), ('$$$$', '$$'), ('a$$b', 'a$b')]:
+            s = Template(tmpl)
+            for i in range(2):
+                eq(s.substitute(), expected)
+                eq(s.safe_substitute(), expected)
+                self.assertTrue(s.is_valid())
+        s = Template('$$$')
+        for i in range(2):
+            self.assertRaises(ValueError, s.substitute)
+            eq(s.safe_substitute(), '$$')
+            self.assertFalse(s.is_valid())
 
     def test_percents(self):
         eq = self.assertEqual
@@ -475,6 +523,55 @@ class PieDelims(Template):
         self.assertEqual(s.substitute(dict(who='tim', what='ham')),
                          'tim likes to eat a bag of ham worth $100')
 
+    def test_settings_fixed_at_class_creation(self):
+        # The pattern is compiled on first use, but from the settings the
+        # class was created with.
+        class MyTemplate(Template):
+            pass
+        MyTemplate.delimiter = '%'
+        MyTemplate.idpattern = '[0-9]+'
+        s = MyTemplate('%x $x')
+        self.assertEqual(s.safe_substitute(x=1), '%x 1')
+        self.assertIsInstance(MyTemplate.pattern, re.Pattern)
+        self.assertIs(MyTemplate.__dict__['pattern'], MyTemplate.pattern)
+
+    def test_template_without_delimiter(self):
+        eq = self.assertEqual
+        class PieDelims(Template):
+            delimiter = '@'
+        for i in range(3):
+            s = PieDelims('tim likes $what')
+            for j in range(3):
+                eq(s.substitute(what='ham'), 'tim likes $what')
+                eq(s.safe_substitute(), 'tim likes $what')
+                self.assertTrue(s.is_valid())
+                eq(s.get_identifiers(), [])
+
+        # A pattern set on the class need not match the delimiter.
+        class MyPattern(Template):
+            pattern = r"""
+            (?P<escaped>@{2})                   |
+            @(?P<named>[_a-z][._a-z0-9]*)       |
+            @{(?P<braced>[_a-z][._a-z0-9]*)}    |
+            (?P<invalid>@)
+            """
+        for i in range(3):
+            s = MyPattern('@who likes @{what} @@')
+            for j in range(3):
+                eq(s.substitute(who='tim', what='ham'), 'tim likes ham $')
+                eq(s.safe_substitute(), '@who likes @{what} $')
+                eq(s.get_identifiers(), ['who', 'what'])
+
+        # Letter delimiters also match in the other case.
+        class LetterDelims(Template):
+            delimiter = 'a'
+        for i in range(3):
+            s = LetterDelims('Awho AA')
+            for j in range(3):
+                eq(s.substitute(who='tim'), 'tim a')
+                eq(s.safe_substitute(), 'Awho a')
+                eq(s.get_identifiers(), ['who'])
+
     def test_is_valid(self):
         eq = self.assertEqual
         s = Template('$who likes to eat a bag of ${what} worth $$100')
@@ -526,6 +623,78 @@ class BadPattern(Template):
         s = BadPattern('@bag.foo.who likes to eat a bag of @bag.what')
         self.assertRaises(ValueError, s.get_identifiers)
 
+    def test_reuse(self):
+        eq = self.assertEqual
+        s = Template('$who likes $what')
+        for i in range(3):
+            eq(s.substitute(who='tim', what='ham'), 'tim likes ham')
+            eq(s.safe_substitute(who='tim'), 'tim likes $what')
+        # Assigning a new template string replaces the parsed one.
+        s.template = '${what} for $meal $$'
+        for i in range(3):
+            eq(s.substitute(what='ham', meal='dinner'), 'ham for dinner $')
+            eq(s.safe_substitute(meal='dinner'), '${what} for dinner $')
+            eq(s.get_identifiers(), ['what', 'meal'])
+        s.template = 'tim likes $'
+        for i in range(3):
+            self.assertRaises(ValueError, s.substitute)
+            eq(s.safe_substitute(), 'tim likes $')
+            self.assertFalse(s.is_valid())
+
+    def test_pickle_and_copy(self):
+        eq = self.assertEqual
+        for tmpl in '$who likes ${what}', 'tim likes\n $5':
+            s = Template(tmpl)
+            for i in range(2):
+                s.safe_substitute(who='tim', what='ham')
+            s.is_valid()
+            copies = [copy.copy(s), copy.deepcopy(s)]
+            for proto in range(pickle.HIGHEST_PROTOCOL + 1):
+                copies.append(pickle.loads(pickle.dumps(s, proto)))
+            for t in copies:
+                self.assertNotIn('_parsed', vars(t))
+                eq(t.template, tmpl)
+                eq(t.safe_substitute(who='tim', what='ham'),
+                   s.safe_substitute(who='tim', what='ham'))
+                eq(t.is_valid(), s.is_valid())
+        with self.assertRaisesRegex(ValueError, 'line 2, col 2'):
+            t.substitute()
+
+        s = SlotsTemplate('$who likes $what')
+        s.extra = 42
+        for i in range(2):
+            s.substitute(who='tim', what='ham')
+        for proto in range(pickle.HIGHEST_PROTOCOL + 1):
+            t = pickle.loads(pickle.dumps(s, proto))
+            self.assertNotIn('_parsed', vars(t))
+            eq(t.extra, 42)
+            eq(t.substitute(who='tim', what='ham'), 'tim likes ham')
+
+    def test_invalid_override(self):
+        class MyTemplate(Template):
+            def _invalid(self, mo):
+                raise LookupError(mo.start('invalid'), mo.group())
+        s = MyTemplate('tim likes $5 and $$')
+        for i in range(3):
+            with self.assertRaises(LookupError) as cm:
+                s.substitute()
+            self.assertEqual(cm.exception.args, (11, '$'))
+
+    def test_pattern_override_on_instance(self):
+        eq = self.assertEqual
+        pattern = re.compile(r'%(?:(?P<escaped>%)|(?P<named>[a-z]+)|'
+                             r'{(?P<braced>[a-z]+)}|(?P<invalid>))')
+        for i in range(3):
+            s = Template('%who $x')
+            s.pattern = pattern
+            for j in range(3):
+                eq(s.safe_substitute(who='W', x='X'), 'W $x')
+                eq(s.substitute(who='W'), 'W $x')
+                eq(s.get_identifiers(), ['who'])
+        # The class's pattern is used again once the instance's is removed.
+        del s.pattern
+        eq(s.safe_substitute(who='W', x='X'), '%who X')
+
 
 if __name__ == '__main__':
     unittest.main()